@@ -2,7 +2,6 @@ import logging
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from tortoise.exceptions import IntegrityError, DoesNotExist
-from jose import JWTError, jwt
 
 from app.db.models import User
 from app.schemas.schemas import User_Pydantic
@@ -102,6 +101,7 @@ async def get_current_user_info(token: str = Depends(oauth2_scheme)):
     """
     
     # logging.info(f"Token received: {token}")  # <-- Add this
+    from jose import JWTError, jwt
     
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
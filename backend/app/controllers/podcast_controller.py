@@ -1,10 +1,15 @@
 # app/controllers/podcast_controller.py
 
-import os, re, shutil, mimetypes, tempfile, logging
+import os, re, zlib, shutil, asyncio, mimetypes, tempfile, logging
 from typing import List, Dict, Any
 import aiofiles
 from fastapi import UploadFile, HTTPException
-from app.db.models import Category, Podcast, Tag
+from app.db.models import Category, Podcast, PodcastRelated, PodcastTrending, Tag
+from app.db.loaders import get_loaders
+from app.core.segment_cache import CachedAudio, segment_cache
+from app.core.zip_stream import ZipMember, ZipStream
+from app.core.events import event_hub
+from app.core.config import SSE_HEARTBEAT_SECONDS
 from app.schemas.podcast_schema import PodcastOut
 from fastapi import Request, HTTPException
 from fastapi.responses import StreamingResponse, JSONResponse
@@ -13,38 +18,45 @@ from tortoise.exceptions import DoesNotExist
 
 from uuid import uuid4
 
-from mutagen import File
-
 MEDIA_DIR = "media"
 os.makedirs(MEDIA_DIR, exist_ok=True)
 
+def serialize_podcast(podcast: Podcast) -> Dict[str, Any]:
+    """
+    Public representation of a podcast loaded with its author, categories and tags.
+    """
+    return {
+        "id": podcast.id,
+        "title": podcast.title or "",
+        "description": podcast.description or "",
+        "audio_file": podcast.audio_file or "",
+        "cover_image": podcast.cover_image,
+        "duration": podcast.duration or 0,
+        "created_at": podcast.created_at.isoformat() if podcast.created_at else None,
+        # "updated_at": podcast.updated_at.isoformat() if podcast.updated_at else None,
+        "author": {
+            "id": getattr(podcast.author, "id", None),
+            "username": getattr(podcast.author, "username", ""),
+            "email": getattr(podcast.author, "email", "")
+        },
+        "categories": [{"id": c.id, "name": c.name} for c in podcast.categories],
+        "tags": [{"id": t.id, "name": t.name} for t in podcast.tags],
+    }
+
+
 async def get_podcast_by_id(podcast_id: int):
     """
     Retrieve a single podcast by its ID, including author details.
     """
     try:
-        podcast = await Podcast.get_or_none(id=podcast_id).select_related("author")
+        podcast = await get_loaders().podcast.load(podcast_id)
 
         if not podcast:
             raise HTTPException(status_code=404, detail="Podcast not found")
 
         logging.info(f"[get_podcast_by_id] Fetched podcast ID: {podcast.id} by {getattr(podcast.author, 'username', 'unknown')}")
 
-        return {
-            "id": podcast.id,
-            "title": podcast.title or "",
-            "description": podcast.description or "",
-            "audio_file": podcast.audio_file or "",
-            "cover_image": podcast.cover_image,
-            "duration": podcast.duration or 0,
-            "created_at": podcast.created_at.isoformat() if podcast.created_at else None,
-            # "updated_at": podcast.updated_at.isoformat() if podcast.updated_at else None,
-            "author": {
-                "id": getattr(podcast.author, "id", None),
-                "username": getattr(podcast.author, "username", ""),
-                "email": getattr(podcast.author, "email", "")
-            }
-        }
+        return serialize_podcast(podcast)
 
     except HTTPException:
         # Relever l’exception d'origine si elle est déjà lancée
@@ -54,6 +66,24 @@ async def get_podcast_by_id(podcast_id: int):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def get_podcasts_by_ids(podcast_ids: List[int]) -> Dict[str, Any]:
+    """
+    Retrieve many podcasts at once (one batched query), in the order of the requested IDs.
+    """
+    ids = list(dict.fromkeys(podcast_ids))
+
+    try:
+        podcasts = await get_loaders().podcast.load_many(ids)
+    except Exception as e:
+        logging.error(f"[get_podcasts_by_ids] Unexpected error for {len(ids)} podcast IDs: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    return {
+        "items": [serialize_podcast(p) for p in podcasts if p],
+        "not_found": [pid for pid, p in zip(ids, podcasts) if not p],
+    }
+
+
 async def get_all_podcasts_by_user(user_id: int) -> List[Dict[str, Any]]:
     try:
         podcasts = await Podcast.filter(author_id=user_id).select_related("author")
@@ -121,7 +151,9 @@ async def create_podcast(
 
         await audio_file.seek(0)
 
-        # Analyse de la durée avec Mutagen
+        # Analyse de la durée avec Mutagen (import différé : coûteux au démarrage)
+        from mutagen import File
+
         audio = File(temp_file_path)
         if audio is None or audio.info is None:
             raise HTTPException(status_code=400, detail="Format audio non supporté")
@@ -153,12 +185,14 @@ async def create_podcast(
             title=title,
             description=description,
             audio_file=audio_path,
+            audio_crc32=zlib.crc32(content),
             cover_image=cover_path,
             duration=audio_duration,
             author_id=author_id,
         )
 
         # Ajout des catégories si fournies
+        categories = []
         if category_ids:
             categories = await Category.filter(id__in=category_ids)
             await podcast.categories.add(*categories)
@@ -168,6 +202,21 @@ async def create_podcast(
             tags = await Tag.filter(id__in=tag_ids)
             await podcast.tags.add(*tags)
 
+        # Notification des clients abonnés (SSE)
+        await event_hub.publish(
+            "podcast_created",
+            {
+                "id": podcast.id,
+                "title": podcast.title,
+                "author_id": author_id,
+                "duration": podcast.duration,
+                "category_ids": [c.id for c in categories],
+                "created_at": podcast.created_at.isoformat() if podcast.created_at else None,
+            },
+            author_id=author_id,
+            category_ids=[c.id for c in categories],
+        )
+
         return await PodcastOut.from_tortoise_orm(podcast)
 
     except HTTPException:
@@ -188,9 +237,38 @@ async def create_podcast(
 CHUNK_SIZE = 1024 * 64  # 64 Ko
 
 
+# 🔁 Lecture de [start, end] : d'abord la partie en cache mémoire, puis le reste sur disque
+async def iter_audio(audio_path: str, start: int, end: int, entry: CachedAudio | None = None):
+    position = start
+    from_memory = from_disk = 0
+
+    try:
+        view = entry.view(start, end) if entry else None
+        if view is not None:
+            for offset in range(0, len(view), CHUNK_SIZE):
+                chunk = view[offset:offset + CHUNK_SIZE]
+                from_memory += len(chunk)
+                yield chunk
+            position += len(view)
+
+        if position <= end:
+            async with aiofiles.open(audio_path, "rb") as f:
+                await f.seek(position)
+                bytes_remaining = end - position + 1
+                while bytes_remaining > 0:
+                    data = await f.read(min(CHUNK_SIZE, bytes_remaining))
+                    if not data:
+                        break
+                    bytes_remaining -= len(data)
+                    from_disk += len(data)
+                    yield data
+    finally:
+        segment_cache.record(from_memory, from_disk)
+
+
 # 🎯 Fonction utilitaire pour récupérer le chemin du fichier
 async def get_podcast_stream(podcast_id: int) -> str:
-    podcast = await Podcast.get_or_none(id=podcast_id)
+    podcast = await get_loaders().podcast_file.load(podcast_id)
     if not podcast or not podcast.audio_file:
         raise HTTPException(status_code=404, detail="Podcast not found")
     return podcast
@@ -236,61 +314,235 @@ async def stream_podcast_controller(podcast_id: int, request: Request, info: boo
             "duration": podcast.duration,  # Placeholder, peut être remplacé par la durée réelle
         })
 
-    # 🔍 5. Gestion du header "Range" (lecture partielle demandée par le client)
+    # 🔍 5. Lecture du header "Range" (lecture partielle demandée par le client)
+    range_header = request.headers.get("range")
+    match = re.match(r"bytes=(\d+)-(\d*)", range_header) if range_header else None
+
+    # 🔥 5.1 Cache des épisodes populaires : début du fichier (ou fichier entier) en mémoire.
+    # Une écoute ne compte qu'au début du fichier : les Range suivants (avance, seek) ne la recomptent pas
+    new_play = match is None or int(match.group(1)) == 0
+    entry = await segment_cache.acquire(audio_path, file_size, new_play=new_play)
+
+    # 📚 6. Réponse partielle si une plage valide est demandée
+    if match:
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else file_size - 1
+        end = min(end, file_size - 1)
+        length = end - start + 1
+
+        # 📦 6.1 Création de la réponse partielle (206 Partial Content)
+        headers = {
+            "Content-Range": f"bytes {start}-{end}/{file_size}",
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(length),
+        }
+
+        return StreamingResponse(
+            iter_audio(audio_path, start, end, entry),
+            status_code=206,
+            media_type=mime_type,
+            headers=headers,
+        )
+
+    # 📦 7. Si aucun "Range", réponse complète (200 OK)
+    headers = {
+        "Content-Length": str(file_size),
+        "Accept-Ranges": "bytes",  # informe que le serveur supporte le Range
+    }
+
+    return StreamingResponse(
+        iter_audio(audio_path, 0, file_size - 1, entry),
+        media_type=mime_type,
+        headers=headers,
+    )
+
+
+def get_stream_cache_stats() -> Dict[str, Any]:
+    """
+    Hit ratio and resident size of the hot-episode segment cache.
+    """
+    return segment_cache.stats()
+
+
+# Nombre maximum d'épisodes dans une archive
+ARCHIVE_MAX_PODCASTS = 500
+
+
+def _archive_entry_name(podcast: Podcast) -> str:
+    _, ext = os.path.splitext(podcast.audio_file)
+    title = re.sub(r'[\\/:*?"<>|\x00-\x1f]+', "_", podcast.title or "").strip(" ._") or "podcast"
+    return f"{podcast.id} - {title}{ext}"
+
+
+def _archive_members(podcasts: List[Podcast]) -> List[ZipMember]:
+    members = []
+    for p in podcasts:
+        try:
+            if not p.audio_file:
+                raise FileNotFoundError(p.id)
+            members.append(ZipMember(p.audio_file, _archive_entry_name(p), p.audio_crc32))
+        except OSError:
+            # Fichier absent (ou supprimé entre-temps) : ignoré, l'archive contient les autres
+            logging.warning(f"[download_archive] Audio file missing for podcast ID {p.id}, skipped")
+    return members
+
+
+# 🗜️ Téléchargement de plusieurs épisodes dans une archive ZIP générée à la volée
+async def download_archive_controller(request: Request, podcast_ids: List[int] | None = None, author_id: int | None = None):
+    """
+    Stream a ZIP (STORED) of the selected podcasts, or of every podcast of an author.
+
+    The archive is generated chunk by chunk from MEDIA_DIR: nothing is staged on disk,
+    Content-Length is exact and "Range" requests allow resuming an interrupted download.
+    """
+
+    # 🧭 1. Sélection des podcasts
+    # La limite est vérifiée avant de charger les lignes
+    too_many = HTTPException(status_code=400, detail=f"Maximum {ARCHIVE_MAX_PODCASTS} podcasts par archive")
+    if podcast_ids:
+        ids = list(dict.fromkeys(podcast_ids))
+        if len(ids) > ARCHIVE_MAX_PODCASTS:
+            raise too_many
+        podcasts = [p for p in await get_loaders().podcast_file.load_many(ids) if p]
+    elif author_id is not None:
+        podcasts = await Podcast.filter(author_id=author_id).order_by("created_at").limit(ARCHIVE_MAX_PODCASTS + 1)
+        if len(podcasts) > ARCHIVE_MAX_PODCASTS:
+            raise too_many
+    else:
+        raise HTTPException(status_code=400, detail="Paramètre 'ids' ou 'author_id' requis")
+
+    # 📏 2. Construction de la table des fichiers (tailles connues d'avance)
+    # os.stat sur chaque fichier : exécuté dans un thread pour ne pas bloquer la boucle
+    members = await asyncio.to_thread(_archive_members, podcasts)
+
+    if not members:
+        raise HTTPException(status_code=404, detail="Aucun fichier audio trouvé")
+
+    archive = ZipStream(members)
+    total = archive.content_length
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": archive.etag,
+        "Content-Disposition": 'attachment; filename="podcasts.zip"',
+    }
+
+    # 🔍 3. Reprise du téléchargement (Range), seulement si l'archive n'a pas changé
     range_header = request.headers.get("range")
-    if range_header:
-        # 📚 5.1 Extraction des bornes de la plage demandée
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == archive.etag):
         match = re.match(r"bytes=(\d+)-(\d*)", range_header)
         if match:
             start = int(match.group(1))
-            end = int(match.group(2)) if match.group(2) else file_size - 1
-            end = min(end, file_size - 1)
-            length = end - start + 1
-
-            # 🔁 5.2 Lecture du fichier depuis la position "start" jusqu'à "end"
-            async def iter_range():
-                async with aiofiles.open(audio_path, "rb") as f:
-                    await f.seek(start)
-                    bytes_remaining = length
-                    while bytes_remaining > 0:
-                        chunk_size = min(CHUNK_SIZE, bytes_remaining)
-                        data = await f.read(chunk_size)
-                        if not data:
-                            break
-                        bytes_remaining -= len(data)
-                        yield data
-
-            # 📦 5.3 Création de la réponse partielle (206 Partial Content)
-            headers = {
-                "Content-Range": f"bytes {start}-{end}/{file_size}",
-                "Accept-Ranges": "bytes",
-                "Content-Length": str(length),
-            }
-
+            end = min(int(match.group(2)) if match.group(2) else total - 1, total - 1)
+            if start > end:
+                raise HTTPException(
+                    status_code=416,
+                    detail="Range Not Satisfiable",
+                    headers={"Content-Range": f"bytes */{total}"},
+                )
+
+            headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+            headers["Content-Length"] = str(end - start + 1)
             return StreamingResponse(
-                iter_range(),
+                archive.iter_bytes(start, end),
                 status_code=206,
-                media_type=mime_type,
+                media_type="application/zip",
                 headers=headers,
             )
 
-    # 🎬 6. Si aucun "Range", lecture complète du fichier
-    async def iter_full():
-        async with aiofiles.open(audio_path, "rb") as f:
-            while True:
-                chunk = await f.read(CHUNK_SIZE)
-                if not chunk:
+    # 📦 4. Archive complète (200 OK)
+    headers["Content-Length"] = str(total)
+    return StreamingResponse(
+        archive.iter_bytes(),
+        media_type="application/zip",
+        headers=headers,
+    )
+
+
+# 📡 Flux Server-Sent Events : nouveaux épisodes des auteurs / catégories suivis
+async def iter_events(request: Request, author_ids: List[int], category_ids: List[int], last_event_id: int | None):
+    # Abonnement dans le générateur (nettoyé par le finally même si le client part tôt),
+    # et avant le replay : aucun événement ne peut se perdre entre les deux
+    sub = event_hub.subscribe(author_ids, category_ids)
+    replayed = set()
+    try:
+        yield "retry: 3000\n\n"
+
+        # Événements manqués depuis la dernière connexion (header Last-Event-ID)
+        if last_event_id is not None:
+            if event_hub.replay_truncated(last_event_id):
+                # Trop ancien pour le buffer : le client doit recharger sa liste
+                yield "event: reset\ndata: {}\n\n"
+            for event in event_hub.replay(sub, last_event_id):
+                replayed.add(event.id)
+                yield event.encode()
+
+        while True:
+            # Client trop lent : la file a débordé, il se reconnectera avec Last-Event-ID
+            if sub.dropped and sub.queue.empty():
+                break
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
                     break
-                yield chunk
+                yield ": heartbeat\n\n"
+                continue
 
-    # 📦 7. Création de la réponse complète (200 OK)
-    headers = {
-        "Content-Length": str(file_size),
-        "Accept-Ranges": "bytes",  # informe que le serveur supporte le Range
-    }
+            if event.id in replayed:
+                continue
+            yield event.encode()
+    finally:
+        event_hub.unsubscribe(sub)
+
+
+async def stream_events_controller(request: Request, author_ids: List[int] | None = None, category_ids: List[int] | None = None):
+    """
+    Subscribe to new-episode notifications, optionally filtered by authors and/or categories.
+    A "reset" event is sent when Last-Event-ID is older than the replay buffer.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
 
     return StreamingResponse(
-        iter_full(),
-        media_type=mime_type,
-        headers=headers,
+        iter_events(request, author_ids or [], category_ids or [], last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # désactive le buffering des reverse proxies (nginx)
+        },
     )
+
+
+# 🔥 Recommandations : lectures dans les tables précalculées par le job périodique
+async def get_trending_podcasts(limit: int = 20) -> Dict[str, Any]:
+    """
+    Trending podcasts (time-decayed recency), read from podcast_trending by rank.
+    """
+    rows = await PodcastTrending.filter(rank__lte=limit).order_by("rank").values_list("podcast_id", "score")
+    podcasts = await get_loaders().podcast.load_many([pid for pid, _ in rows])
+
+    return {
+        "items": [{**serialize_podcast(p), "score": score} for p, (_, score) in zip(podcasts, rows) if p],
+    }
+
+
+async def get_related_podcasts(podcast_id: int, limit: int = 10) -> Dict[str, Any]:
+    """
+    Podcasts sharing tags/categories with `podcast_id`, read from podcast_related by rank.
+    """
+    rows = await PodcastRelated.filter(podcast_id=podcast_id, rank__lte=limit).order_by("rank").values_list("related_id", "score")
+
+    # Le podcast demandé et ses voisins sont chargés dans la même requête batchée
+    loader = get_loaders().podcast
+    podcast, *related = await loader.load_many([podcast_id] + [rid for rid, _ in rows])
+    if not podcast:
+        raise HTTPException(status_code=404, detail="Podcast not found")
+
+    return {
+        "podcast_id": podcast_id,
+        "items": [{**serialize_podcast(p), "score": score} for p, (_, score) in zip(related, rows) if p],
+    }
@@ -21,4 +21,36 @@ TORTOISE_ORM = {
     },
     "use_tz": False,
     "timezone": "UTC",
-}
\ No newline at end of file
+}
+
+# Startup configuration
+# APP_ENV=production skips generate_schemas and relies on aerich migrations instead
+APP_ENV = os.getenv("APP_ENV", "development")
+IS_PRODUCTION = APP_ENV == "production"
+
+GENERATE_SCHEMAS = os.getenv("GENERATE_SCHEMAS", "false" if IS_PRODUCTION else "true").lower() in ("1", "true", "yes")
+
+# Nombre de connexions ouvertes à l'avance dans le pool au démarrage
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "4"))
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "migrations", "models")
+
+# Cache mémoire des épisodes populaires (streaming)
+SEGMENT_CACHE_BUDGET_MB = int(os.getenv("SEGMENT_CACHE_BUDGET_MB", "256"))
+SEGMENT_CACHE_HEAD_MB = int(os.getenv("SEGMENT_CACHE_HEAD_MB", "1"))
+SEGMENT_CACHE_TOP_K = int(os.getenv("SEGMENT_CACHE_TOP_K", "16"))
+
+# Notifications temps réel (Server-Sent Events)
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+SSE_REPLAY_SIZE = int(os.getenv("SSE_REPLAY_SIZE", "500"))
+# Pont Postgres LISTEN/NOTIFY pour diffuser les événements entre plusieurs workers
+EVENTS_PG_BRIDGE = os.getenv("EVENTS_PG_BRIDGE", "false").lower() in ("1", "true", "yes")
+EVENTS_PG_CHANNEL = os.getenv("EVENTS_PG_CHANNEL", "podcast_events")
+
+# Recommandations (épisodes similaires et tendances), recalculées périodiquement
+RECOMMENDATIONS_INTERVAL_SECONDS = int(os.getenv("RECOMMENDATIONS_INTERVAL_SECONDS", "3600"))  # 0 = désactivé
+RECOMMENDATIONS_STARTUP_DELAY_SECONDS = int(os.getenv("RECOMMENDATIONS_STARTUP_DELAY_SECONDS", "120"))  # + jitter, hors du démarrage
+RELATED_TOP_K = int(os.getenv("RELATED_TOP_K", "10"))
+TRENDING_SIZE = int(os.getenv("TRENDING_SIZE", "100"))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "48"))
@@ -0,0 +1,275 @@
+# app/core/events.py
+# In-process pub/sub hub feeding the Server-Sent Events endpoint
+
+import json, time, asyncio, logging
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set
+from uuid import uuid4
+from app.core.config import (
+    SSE_QUEUE_SIZE, SSE_REPLAY_SIZE, EVENTS_PG_BRIDGE, EVENTS_PG_CHANNEL, DB_URL,
+)
+
+
+class Event:
+    """
+    A notification published to the hub, with the author and categories used for filtering.
+    """
+
+    __slots__ = ("id", "type", "data", "author_id", "category_ids")
+
+    def __init__(self, id: int, type: str, data: Dict[str, Any], author_id: Optional[int] = None, category_ids: Iterable[int] = ()):
+        self.id = id
+        self.type = type
+        self.data = data
+        self.author_id = author_id
+        self.category_ids = list(category_ids)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "data": self.data,
+            "author_id": self.author_id,
+            "category_ids": self.category_ids,
+        }
+
+    def encode(self) -> str:
+        """Server-Sent Events frame."""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class Subscription:
+    """
+    One connected client: its filters and a bounded queue of pending events.
+    """
+
+    def __init__(self, author_ids: Iterable[int] = (), category_ids: Iterable[int] = (), queue_size: int = SSE_QUEUE_SIZE):
+        self.author_ids: Set[int] = set(author_ids)
+        self.category_ids: Set[int] = set(category_ids)
+        self.queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def matches(self, event: Event) -> bool:
+        # Sans filtre, le client reçoit tout ; sinon l'auteur OU une des catégories doit correspondre
+        if not self.author_ids and not self.category_ids:
+            return True
+        return event.author_id in self.author_ids or not self.category_ids.isdisjoint(event.category_ids)
+
+
+class EventHub:
+    """
+    Fan-out of events to subscribers.
+
+    Slow consumers whose queue is full are dropped instead of buffering without limit;
+    they reconnect with Last-Event-ID and catch up from the replay ring buffer.
+    """
+
+    def __init__(self, replay_size: int = SSE_REPLAY_SIZE):
+        self.subscribers: Set[Subscription] = set()
+        self.history: deque[Event] = deque(maxlen=replay_size)
+        self.origin = uuid4().hex
+        self._last_id = 0
+        self._bridge = None
+        self.dropped_count = 0
+
+    def _next_id(self) -> int:
+        # Identifiant croissant basé sur l'horloge : comparable entre workers pour Last-Event-ID
+        self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+        return self._last_id
+
+    async def publish(self, type: str, data: Dict[str, Any], author_id: Optional[int] = None, category_ids: Iterable[int] = ()) -> Event:
+        event = Event(self._next_id(), type, data, author_id, category_ids)
+        self.dispatch(event)
+
+        if self._bridge is not None:
+            try:
+                await self._bridge.notify(event)
+            except Exception as e:
+                logging.error(f"[events] Unable to forward event {event.id} to other workers: {e}")
+        return event
+
+    def dispatch(self, event: Event):
+        """Deliver an event to the local subscribers and keep it for replay."""
+        self._last_id = max(self._last_id, event.id)
+        self.history.append(event)
+
+        for sub in list(self.subscribers):
+            if not sub.matches(event):
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                sub.dropped = True
+                self.subscribers.discard(sub)
+                self.dropped_count += 1
+                logging.warning("[events] Slow subscriber dropped")
+
+    def subscribe(self, author_ids: Iterable[int] = (), category_ids: Iterable[int] = ()) -> Subscription:
+        sub = Subscription(author_ids, category_ids)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self.subscribers.discard(sub)
+
+    def replay(self, sub: Subscription, last_event_id: int) -> List[Event]:
+        """Events missed since `last_event_id` that are still in the ring buffer."""
+        return [e for e in self.history if e.id > last_event_id and sub.matches(e)]
+
+    def replay_truncated(self, last_event_id: int) -> bool:
+        """True when `last_event_id` is older than the ring buffer: some events can no longer be replayed."""
+        return bool(self.history) and last_event_id < self.history[0].id
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "buffered_events": len(self.history),
+            "dropped_subscribers": self.dropped_count,
+            # None quand le pont est désactivé ; sinon état réel de la connexion LISTEN
+            "bridge": self._bridge.health() if self._bridge is not None else None,
+        }
+
+    # 🔌 Pont multi-workers
+
+    async def start_bridge(self):
+        if EVENTS_PG_BRIDGE and self._bridge is None:
+            bridge = PostgresBridge(self, EVENTS_PG_CHANNEL)
+            await bridge.start()
+            self._bridge = bridge
+
+    async def stop_bridge(self):
+        if self._bridge is not None:
+            await self._bridge.stop()
+            self._bridge = None
+
+
+class PostgresBridge:
+    """
+    Forward events between workers through Postgres LISTEN/NOTIFY.
+    Each worker ignores the notifications it sent itself.
+
+    The LISTEN connection is supervised: when it drops (termination listener or failed ping)
+    it is reopened with exponential backoff. Notifications sent meanwhile are lost for this worker.
+    """
+
+    PING_SECONDS = 30
+    MAX_BACKOFF_SECONDS = 30
+
+    def __init__(self, hub: EventHub, channel: str):
+        self.hub = hub
+        self.channel = channel
+        self._listener = None
+        self._lost = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.connected = False
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+        self.disconnected_since: Optional[float] = None
+
+    async def start(self):
+        # Première connexion attendue : une base injoignable au démarrage reste une erreur
+        await self._connect()
+        self._task = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close()
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "channel": self.channel,
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+            "disconnected_for_s": round(time.monotonic() - self.disconnected_since, 1) if self.disconnected_since else None,
+        }
+
+    async def notify(self, event: Event):
+        from tortoise import Tortoise
+
+        payload = json.dumps({"origin": self.hub.origin, **event.to_dict()})
+        await Tortoise.get_connection("default").execute_query("SELECT pg_notify($1, $2)", [self.channel, payload])
+
+    # 🔁 Connexion LISTEN supervisée
+
+    async def _connect(self):
+        import asyncpg
+
+        # LISTEN nécessite une connexion dédiée, hors du pool de Tortoise
+        self._lost.clear()
+        listener = await asyncpg.connect(DB_URL)
+        try:
+            listener.add_termination_listener(self._on_terminated)
+            await listener.add_listener(self.channel, self._on_notify)
+        except BaseException:
+            listener.terminate()
+            raise
+        self._listener = listener
+        self.connected = True
+        self.disconnected_since = None
+        logging.info(f"[events] Listening on Postgres channel {self.channel!r}")
+
+    async def _supervise(self):
+        backoff = 1
+        while True:
+            if self.connected:
+                # Le listener de terminaison ne voit pas une connexion à moitié ouverte : ping périodique
+                try:
+                    await asyncio.wait_for(self._lost.wait(), timeout=self.PING_SECONDS)
+                except asyncio.TimeoutError:
+                    try:
+                        await asyncio.wait_for(self._listener.execute("SELECT 1"), timeout=self.PING_SECONDS)
+                        continue
+                    except Exception as e:
+                        self.last_error = f"ping failed: {e!r}"
+                self._mark_lost()
+                await self._close()
+                backoff = 1
+
+            await asyncio.sleep(backoff)
+            try:
+                await self._connect()
+                self.reconnects += 1
+            except Exception as e:
+                self.last_error = repr(e)
+                logging.warning(f"[events] Reconnection to Postgres channel {self.channel!r} failed, retry in {backoff}s: {e}")
+                backoff = min(backoff * 2, self.MAX_BACKOFF_SECONDS)
+
+    def _on_terminated(self, connection):
+        if connection is self._listener:
+            self.last_error = "connection terminated"
+            self._mark_lost()
+            self._lost.set()
+
+    def _mark_lost(self):
+        if self.connected:
+            self.connected = False
+            self.disconnected_since = time.monotonic()
+            logging.error(f"[events] Lost the Postgres LISTEN connection ({self.last_error}), events from other workers are missed until it is back")
+
+    async def _close(self):
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            try:
+                await listener.close(timeout=5)
+            except Exception:
+                listener.terminate()
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        try:
+            message = json.loads(payload)
+            if message.pop("origin") == self.hub.origin:
+                return
+            self.hub.dispatch(Event(**message))
+        except Exception as e:
+            logging.error(f"[events] Invalid notification on {channel!r}: {e}")
+
+
+event_hub = EventHub()
@@ -0,0 +1,231 @@
+# app/core/recommendations.py
+# Periodic job precomputing related episodes and trending scores
+
+import time, random, asyncio, logging
+from datetime import timedelta
+from typing import List, Sequence, Tuple
+from tortoise import Tortoise, timezone
+from tortoise.transactions import in_transaction
+from app.db.models import Podcast, PodcastRelated, PodcastTrending
+from app.core.config import (
+    RELATED_TOP_K, TRENDING_SIZE, TRENDING_HALF_LIFE_HOURS,
+    RECOMMENDATIONS_INTERVAL_SECONDS, RECOMMENDATIONS_STARTUP_DELAY_SECONDS,
+)
+
+# Poids relatifs des tags (précis) et des catégories (larges) dans la similarité
+TAG_WEIGHT = 1.0
+CATEGORY_WEIGHT = 0.5
+
+# Budget d'entrées par bloc de la matrice de similarité (lignes du bloc x n) : avec des catégories
+# partagées presque tous les couples d'épisodes ont un score, chaque bloc est quasi dense
+SIMILARITY_BLOCK_ENTRIES = 4_000_000
+
+# Verrou Postgres : un seul worker écrit les résultats à la fois
+ADVISORY_LOCK_KEY = 0x504F4443  # "PODC"
+
+
+# 🧮 Calculs vectorisés (NumPy / SciPy, importés à la demande)
+
+def build_feature_matrix(n: int, tag_pairs: Sequence[Tuple[int, int]], category_pairs: Sequence[Tuple[int, int]]):
+    """
+    Sparse (episodes x tags+categories) matrix, TF-IDF weighted and L2-normalized,
+    so that X @ X.T is the cosine similarity. Pairs are (episode row, tag/category id).
+    """
+    import numpy as np
+    from scipy import sparse
+
+    tag_ids = np.unique(np.array([t for _, t in tag_pairs], dtype=np.int64))
+    category_ids = np.unique(np.array([c for _, c in category_pairs], dtype=np.int64))
+    n_features = len(tag_ids) + len(category_ids)
+
+    rows = np.array([r for r, _ in tag_pairs] + [r for r, _ in category_pairs], dtype=np.int64)
+    cols = np.concatenate([
+        np.searchsorted(tag_ids, [t for _, t in tag_pairs]).astype(np.int64),
+        len(tag_ids) + np.searchsorted(category_ids, [c for _, c in category_pairs]).astype(np.int64),
+    ])
+    weights = np.concatenate([
+        np.full(len(tag_pairs), TAG_WEIGHT),
+        np.full(len(category_pairs), CATEGORY_WEIGHT),
+    ])
+
+    X = sparse.csr_matrix((weights, (rows, cols)), shape=(n, n_features))
+    X.sum_duplicates()
+
+    # IDF : un tag partagé par tout le catalogue ne rapproche pas deux épisodes
+    df = np.bincount(X.indices, minlength=n_features)
+    idf = np.log((1 + n) / (1 + df)) + 1
+    X = X @ sparse.diags(idf)
+
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return (sparse.diags(1 / norms) @ X).tocsr()
+
+
+def top_k_similar(X, k: int) -> List[Tuple[int, "np.ndarray", "np.ndarray"]]:
+    """
+    For every row of X, the k most similar other rows as (row, columns, scores), best first.
+    """
+    import numpy as np
+
+    results = []
+    XT = X.T.tocsc()
+    # Taille du bloc déduite de n pour borner la mémoire (~50 Mo par bloc)
+    block_rows = max(1, SIMILARITY_BLOCK_ENTRIES // max(X.shape[0], 1))
+    for block_start in range(0, X.shape[0], block_rows):
+        S = (X[block_start:block_start + block_rows] @ XT).tocsr()
+        S.eliminate_zeros()
+
+        for r in range(S.shape[0]):
+            row = block_start + r
+            cols = S.indices[S.indptr[r]:S.indptr[r + 1]]
+            scores = S.data[S.indptr[r]:S.indptr[r + 1]]
+            keep = cols != row
+            cols, scores = cols[keep], scores[keep]
+            if not len(scores):
+                continue
+            if len(scores) > k:
+                top = np.argpartition(-scores, k)[:k]
+                cols, scores = cols[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            results.append((row, cols[order], scores[order]))
+    return results
+
+
+def trending_scores(created_at: Sequence[float], now: float, half_life_hours: float):
+    """
+    Pure recency score, halved every `half_life_hours` of episode age.
+    There is no listening table yet: once plays are persisted, weight this by them.
+    """
+    import numpy as np
+
+    age_hours = np.maximum(now - np.asarray(created_at, dtype=np.float64), 0) / 3600
+    return np.exp2(-age_hours / half_life_hours)
+
+
+def compute_recommendations(
+    podcast_ids: List[int],
+    created_at: List[float],
+    tag_pairs: List[Tuple[int, int]],
+    category_pairs: List[Tuple[int, int]],
+    now: float,
+) -> Tuple[List[Tuple[int, int, int, float]], List[Tuple[int, int, float]]]:
+    """
+    Pure computation (run in a thread): returns related rows (podcast_id, rank, related_id, score)
+    and trending rows (rank, podcast_id, score). Pairs reference podcast IDs.
+    """
+    import numpy as np
+
+    index = {pid: i for i, pid in enumerate(podcast_ids)}
+    tag_pairs = [(index[p], t) for p, t in tag_pairs if p in index]
+    category_pairs = [(index[p], c) for p, c in category_pairs if p in index]
+
+    related = []
+    if tag_pairs or category_pairs:
+        X = build_feature_matrix(len(podcast_ids), tag_pairs, category_pairs)
+        for row, cols, scores in top_k_similar(X, RELATED_TOP_K):
+            for rank, (col, score) in enumerate(zip(cols, scores), start=1):
+                related.append((podcast_ids[row], rank, podcast_ids[col], float(score)))
+
+    scores = trending_scores(created_at, now, TRENDING_HALF_LIFE_HOURS)
+    best = np.argsort(-scores, kind="stable")[:TRENDING_SIZE]
+    trending = [(rank, podcast_ids[i], float(scores[i])) for rank, i in enumerate(best, start=1)]
+
+    return related, trending
+
+
+# 🗄️ Lecture du catalogue et écriture des tables précalculées
+
+async def load_catalog(conn):
+    podcasts = await Podcast.all().using_db(conn).order_by("id").values_list("id", "created_at")
+
+    _, tag_rows = await conn.execute_query('SELECT "podcasts_id", "tag_id" FROM "podcast_tag"')
+    _, category_rows = await conn.execute_query('SELECT "podcasts_id", "category_id" FROM "podcast_category"')
+
+    return (
+        podcasts,
+        [(r["podcasts_id"], r["tag_id"]) for r in tag_rows],
+        [(r["podcasts_id"], r["category_id"]) for r in category_rows],
+    )
+
+
+async def results_are_fresh(conn) -> bool:
+    """
+    True when the tables were rebuilt less than RECOMMENDATIONS_INTERVAL_SECONDS ago (by any worker).
+    """
+    # Toutes les lignes d'un calcul partagent computed_at : la ligne de rang 1 suffit (clé primaire)
+    computed_at = await PodcastTrending.filter(rank=1).using_db(conn).first().values_list("computed_at", flat=True)
+    return computed_at is not None and timezone.now() - computed_at < timedelta(seconds=RECOMMENDATIONS_INTERVAL_SECONDS)
+
+
+async def refresh_recommendations(force: bool = False) -> bool:
+    """
+    Rebuild podcast_related and podcast_trending. Returns False when skipped: results still fresh
+    (computed by another worker) or another worker is writing.
+    """
+    started = time.perf_counter()
+    conn = Tortoise.get_connection("default")
+
+    # Évite de recalculer ce qu'un autre worker vient de publier
+    if not force and await results_are_fresh(conn):
+        return False
+
+    # Lecture et calcul hors transaction : aucune connexion du pool ne reste bloquée pendant le calcul
+    podcasts, tag_pairs, category_pairs = await load_catalog(conn)
+    if not podcasts:
+        return True
+
+    podcast_ids = [pid for pid, _ in podcasts]
+    created_at = [c.timestamp() if c else 0.0 for _, c in podcasts]
+
+    related, trending = await asyncio.to_thread(
+        compute_recommendations, podcast_ids, created_at, tag_pairs, category_pairs, time.time(),
+    )
+
+    # La transaction ne couvre que le remplacement des tables
+    async with in_transaction() as conn:
+        _, rows = await conn.execute_query("SELECT pg_try_advisory_xact_lock($1) AS locked", [ADVISORY_LOCK_KEY])
+        if not rows[0]["locked"]:
+            logging.info("[recommendations] Another worker is writing, skipped")
+            return False
+        if not force and await results_are_fresh(conn):
+            logging.info("[recommendations] Results refreshed by another worker meanwhile, skipped")
+            return False
+
+        # Remplacement complet : les lecteurs voient l'ancienne version jusqu'au commit
+        computed_at = timezone.now()
+        await PodcastRelated.all().using_db(conn).delete()
+        await PodcastRelated.bulk_create(
+            [PodcastRelated(podcast_id=p, rank=rank, related_id=r, score=s) for p, rank, r, s in related],
+            batch_size=1000,
+            using_db=conn,
+        )
+        await PodcastTrending.all().using_db(conn).delete()
+        await PodcastTrending.bulk_create(
+            [PodcastTrending(rank=rank, podcast_id=p, score=s, computed_at=computed_at) for rank, p, s in trending],
+            batch_size=1000,
+            using_db=conn,
+        )
+
+    logging.info(
+        f"[recommendations] {len(podcasts)} podcasts, {len(related)} related rows, "
+        f"{len(trending)} trending rows in {round((time.perf_counter() - started) * 1000)} ms"
+    )
+    return True
+
+
+async def run_recommendations_job(interval: float = RECOMMENDATIONS_INTERVAL_SECONDS):
+    """
+    Background loop started from the lifespan hook. The first run is delayed (with jitter)
+    so that booting or recycling workers don't pay for it, and is skipped if the results are fresh.
+    """
+    delay = RECOMMENDATIONS_STARTUP_DELAY_SECONDS
+    await asyncio.sleep(delay + random.uniform(0, max(delay, 1)))
+
+    while True:
+        try:
+            await refresh_recommendations()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"[recommendations] Refresh failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,222 @@
+# app/core/segment_cache.py
+# Popularity-aware memory cache for the audio streaming path
+
+import os, mmap, time, asyncio, logging
+from typing import Dict, Optional
+from app.core.config import SEGMENT_CACHE_BUDGET_MB, SEGMENT_CACHE_HEAD_MB, SEGMENT_CACHE_TOP_K
+
+MB = 1024 * 1024
+
+
+class CachedAudio:
+    """
+    Cache state of one audio file: access frequency, head segment and optional full mmap.
+    """
+
+    __slots__ = ("path", "size", "freq", "last_access", "head", "mm")
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self.freq = 0
+        self.last_access = 0.0
+        self.head: Optional[bytes] = None
+        self.mm: Optional[mmap.mmap] = None
+
+    @property
+    def cached_bytes(self) -> int:
+        """Length of the prefix of the file that can be served from memory."""
+        if self.mm is not None:
+            return self.size
+        return len(self.head) if self.head is not None else 0
+
+    def view(self, start: int, end: int) -> Optional[memoryview]:
+        """
+        Memory slice covering [start, end] (inclusive), truncated to the cached prefix.
+        Returns None when `start` is outside the cached region.
+        """
+        if self.mm is not None:
+            buffer = self.mm
+        elif self.head is not None:
+            buffer = self.head
+        else:
+            return None
+
+        if start >= len(buffer):
+            return None
+        return memoryview(buffer)[start:min(end + 1, len(buffer))]
+
+
+class SegmentCache:
+    """
+    Keep the head of every recently played episode and the whole body (mmap) of the top-K
+    most played ones within a memory budget.
+
+    Eviction is LFU (plays, not HTTP requests) with LRU tie-breaking; frequencies are halved
+    every `decay_every` plays so that yesterday's hits make room for new episodes.
+    """
+
+    def __init__(self, budget_bytes: int, head_bytes: int, top_k: int, promote_after: int = 2, decay_every: int = 10_000):
+        self.budget_bytes = budget_bytes
+        self.head_bytes = head_bytes
+        self.top_k = top_k
+        self.promote_after = promote_after
+        self.decay_every = decay_every
+
+        self.entries: Dict[str, CachedAudio] = {}
+        self.resident_bytes = 0
+        self._accesses = 0
+        self._loading: set[str] = set()
+
+        self.requests = 0
+        self.hits = 0
+        self.partial_hits = 0
+        self.bytes_from_memory = 0
+        self.bytes_from_disk = 0
+
+    # 🎯 Accès et chargement
+
+    async def acquire(self, path: str, size: int, new_play: bool = True) -> CachedAudio:
+        """
+        Make sure the head of `path` (or its whole body if it is hot enough) is resident.
+
+        Only requests starting a play (`new_play`, i.e. from byte 0) count towards the frequency;
+        the following range requests of the same playback only refresh the recency.
+        """
+        entry = self.entries.get(path)
+        if entry is None or entry.size != size:
+            if entry is not None:
+                self._drop(entry)
+            entry = self.entries[path] = CachedAudio(path, size)
+
+        entry.last_access = time.monotonic()
+        if new_play:
+            entry.freq += 1
+            self._accesses += 1
+            if self._accesses % self.decay_every == 0:
+                self._decay()
+
+        if path in self._loading:
+            return entry
+
+        self._loading.add(path)
+        try:
+            should_map, victim = self._should_map(entry) if entry.mm is None else (False, None)
+            if should_map:
+                mm = await asyncio.to_thread(self._map_file, path)
+                if mm is not None and self.entries.get(path) is entry and self._reserve(entry, size - entry.cached_bytes, freeing=victim):
+                    entry.head = None
+                    entry.mm = mm
+                    # Le plus froid du top-K n'est libéré qu'une fois la nouvelle projection installée
+                    if victim is not None and victim.mm is not None:
+                        self._release(victim)
+            elif entry.mm is None and entry.head is None and self.head_bytes > 0:
+                head = await asyncio.to_thread(self._read_head, path, min(self.head_bytes, size))
+                if head and self.entries.get(path) is entry and self._reserve(entry, len(head)):
+                    entry.head = head
+        except OSError as e:
+            logging.warning(f"[segment_cache] Unable to cache {path}: {e}")
+        finally:
+            self._loading.discard(path)
+
+        return entry
+
+    def record(self, from_memory: int, from_disk: int):
+        """Account one served response for the hit-ratio metrics."""
+        self.requests += 1
+        self.bytes_from_memory += from_memory
+        self.bytes_from_disk += from_disk
+        if from_disk == 0 and from_memory > 0:
+            self.hits += 1
+        elif from_memory > 0:
+            self.partial_hits += 1
+
+    def stats(self) -> dict:
+        served = self.bytes_from_memory + self.bytes_from_disk
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "hit_ratio": round(self.hits / self.requests, 4) if self.requests else 0.0,
+            "byte_hit_ratio": round(self.bytes_from_memory / served, 4) if served else 0.0,
+            "resident_bytes": self.resident_bytes,
+            "budget_bytes": self.budget_bytes,
+            "tracked_files": len(self.entries),
+            "head_segments": sum(1 for e in self.entries.values() if e.head is not None),
+            "mapped_files": sum(1 for e in self.entries.values() if e.mm is not None),
+        }
+
+    # 🧮 Politique d'admission et d'éviction
+
+    def _should_map(self, entry: CachedAudio) -> tuple[bool, Optional[CachedAudio]]:
+        """
+        Whether `entry` belongs in the top-K, and which mapped file it would replace (not released here).
+        """
+        if self.top_k <= 0 or entry.freq < self.promote_after or entry.size > self.budget_bytes:
+            return False, None
+        mapped = [e for e in self.entries.values() if e.mm is not None]
+        if len(mapped) < self.top_k:
+            return True, None
+        coldest = min(mapped, key=lambda e: (e.freq, e.last_access))
+        if coldest.freq >= entry.freq:
+            return False, None
+        return True, coldest
+
+    def _reserve(self, entry: CachedAudio, nbytes: int, freeing: Optional[CachedAudio] = None) -> bool:
+        """
+        Make room for `nbytes` by evicting colder entries. Refuses (returns False) rather than
+        evicting something more popular than `entry`.
+
+        `freeing` is an entry the caller will release right after: its memory counts as available.
+        """
+        freed = freeing.cached_bytes if freeing is not None and freeing.mm is not None else 0
+        while self.resident_bytes - freed + nbytes > self.budget_bytes:
+            candidates = [e for e in self.entries.values() if e is not entry and e is not freeing and e.cached_bytes > 0]
+            if not candidates:
+                return False
+            victim = min(candidates, key=lambda e: (e.freq, e.last_access))
+            if victim.freq > entry.freq:
+                return False
+            self._release(victim)
+
+        self.resident_bytes += nbytes
+        return True
+
+    def _release(self, entry: CachedAudio):
+        """Free the memory held by `entry`, keeping its access statistics."""
+        self.resident_bytes -= entry.cached_bytes
+        entry.head = None
+        # Pas de close() explicite : des memoryview peuvent encore être en cours d'envoi,
+        # la projection est libérée quand la dernière référence disparaît.
+        entry.mm = None
+
+    def _drop(self, entry: CachedAudio):
+        self._release(entry)
+        self.entries.pop(entry.path, None)
+
+    def _decay(self):
+        for entry in list(self.entries.values()):
+            entry.freq //= 2
+            if entry.freq == 0 and entry.cached_bytes == 0:
+                self.entries.pop(entry.path, None)
+
+    # 📂 Lecture des fichiers (exécutée dans un thread)
+
+    @staticmethod
+    def _read_head(path: str, length: int) -> bytes:
+        with open(path, "rb") as f:
+            return f.read(length)
+
+    @staticmethod
+    def _map_file(path: str) -> Optional[mmap.mmap]:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+segment_cache = SegmentCache(
+    budget_bytes=SEGMENT_CACHE_BUDGET_MB * MB,
+    head_bytes=SEGMENT_CACHE_HEAD_MB * MB,
+    top_k=SEGMENT_CACHE_TOP_K,
+)
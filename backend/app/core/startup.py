@@ -0,0 +1,98 @@
+# app/core/startup.py
+
+import os, time, asyncio, logging, mimetypes
+from contextlib import asynccontextmanager, contextmanager, suppress
+from app.core.config import APP_ENV, IS_PRODUCTION, GENERATE_SCHEMAS, RECOMMENDATIONS_INTERVAL_SECONDS
+from app.db.init import init_db, check_migrations, warm_db_pool
+from app.core.events import event_hub
+
+
+class StartupTimer:
+    """
+    Collect the duration of each startup phase (in milliseconds).
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    async def run(self, name: str, coro):
+        with self.phase(name):
+            return await coro
+
+    def report(self) -> dict:
+        return {
+            "env": APP_ENV,
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000, 2),
+            "phases": dict(self.phases),
+        }
+
+
+async def warm_caches():
+    """
+    Fill the process-level caches used by the request handlers.
+    """
+    from app.controllers.podcast_controller import MEDIA_DIR
+
+    # mimetypes lit les fichiers système à la première utilisation
+    await asyncio.to_thread(mimetypes.init)
+    os.makedirs(MEDIA_DIR, exist_ok=True)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Open the ORM, then verify migrations and warm the pool and caches concurrently.
+    Phase timings are logged and exposed on `app.state.startup_timings`.
+    """
+    timer = StartupTimer()
+    if getattr(app.state, "import_ms", None) is not None:
+        timer.phases["imports"] = app.state.import_ms
+
+    db = init_db(app)
+    with timer.phase("orm_init"):
+        await db.__aenter__()
+
+    try:
+        tasks = [
+            timer.run("db_pool_warmup", warm_db_pool()),
+            timer.run("cache_warmup", warm_caches()),
+            timer.run("events_bridge", event_hub.start_bridge()),
+        ]
+        # En production le schéma vient d'aerich : on vérifie la version une seule fois
+        if IS_PRODUCTION and not GENERATE_SCHEMAS:
+            tasks.append(timer.run("migration_check", check_migrations()))
+
+        with timer.phase("warmup"):
+            await asyncio.gather(*tasks)
+    except BaseException:
+        await event_hub.stop_bridge()
+        await db.__aexit__(None, None, None)
+        raise
+
+    app.state.startup_timings = timer.report()
+    logging.info(f"[startup] Ready in {app.state.startup_timings['total_ms']} ms: {app.state.startup_timings['phases']}")
+
+    # Recalcul périodique des recommandations, en tâche de fond
+    recommendations_task = None
+    if RECOMMENDATIONS_INTERVAL_SECONDS > 0:
+        from app.core.recommendations import run_recommendations_job
+        recommendations_task = asyncio.create_task(run_recommendations_job())
+
+    try:
+        yield
+    finally:
+        if recommendations_task is not None:
+            recommendations_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await recommendations_task
+        await event_hub.stop_bridge()
+        await db.__aexit__(None, None, None)
@@ -0,0 +1,251 @@
+# app/core/zip_stream.py
+# ZIP archive (STORED, no compression) generated on the fly with an exact, precomputed size
+
+import os, time, struct, zlib, hashlib, asyncio
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import aiofiles
+
+CHUNK_SIZE = 1024 * 64  # 64 Ko
+
+ZIP32_LIMIT = 0xFFFFFFFF
+ZIP32_MAX_ENTRIES = 0xFFFF
+
+# bit 3 : CRC dans le "data descriptor" après les données, bit 11 : noms en UTF-8
+FLAGS = 0x0008 | 0x0800
+VERSION_DEFAULT = 20
+VERSION_ZIP64 = 45
+
+# Repli pour les épisodes sans CRC en base : CRC32 déjà calculés, indexés par (chemin, taille, mtime),
+# en LRU borné pour ne pas grossir indéfiniment dans chaque worker
+CRC_CACHE_MAX_ENTRIES = 4096
+_crc_cache: "OrderedDict[Tuple[str, int, int], int]" = OrderedDict()
+
+
+def _cached_crc(key: Tuple[str, int, int]) -> Optional[int]:
+    crc = _crc_cache.get(key)
+    if crc is not None:
+        _crc_cache.move_to_end(key)
+    return crc
+
+
+def _remember_crc(key: Tuple[str, int, int], crc: int):
+    _crc_cache[key] = crc
+    _crc_cache.move_to_end(key)
+    while len(_crc_cache) > CRC_CACHE_MAX_ENTRIES:
+        _crc_cache.popitem(last=False)
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    t = time.localtime(timestamp)
+    if t.tm_year < 1980:
+        return 0, (0 << 9) | (1 << 5) | 1
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+class ZipMember:
+    """
+    One file of the archive and its position in the stream.
+    `crc` is the CRC32 stored with the podcast, when known.
+    """
+
+    def __init__(self, path: str, name: str, crc: Optional[int] = None):
+        stat = os.stat(path)
+        self.path = path
+        self.name = name.encode("utf-8")
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.dos_time, self.dos_date = _dos_datetime(stat.st_mtime)
+        self.offset = 0
+        self.crc: Optional[int] = crc if crc is not None else _cached_crc(self.cache_key)
+
+    @property
+    def cache_key(self) -> Tuple[str, int, int]:
+        return (self.path, self.size, self.mtime_ns)
+
+    @property
+    def zip64(self) -> bool:
+        return self.size >= ZIP32_LIMIT
+
+    @property
+    def version(self) -> int:
+        return VERSION_ZIP64 if self.zip64 or self.offset >= ZIP32_LIMIT else VERSION_DEFAULT
+
+    def local_header(self) -> bytes:
+        # Les tailles sont connues d'avance : on les écrit aussi dans l'en-tête local
+        if self.zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, self.size, self.size)
+            size32 = ZIP32_LIMIT
+        else:
+            extra = b""
+            size32 = self.size
+        return struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, self.version, FLAGS, 0, self.dos_time, self.dos_date,
+            0, size32, size32, len(self.name), len(extra),
+        ) + self.name + extra
+
+    def local_header_size(self) -> int:
+        return 30 + len(self.name) + (20 if self.zip64 else 0)
+
+    def data_descriptor(self) -> bytes:
+        if self.zip64:
+            return struct.pack("<IIQQ", 0x08074B50, self.crc, self.size, self.size)
+        return struct.pack("<IIII", 0x08074B50, self.crc, self.size, self.size)
+
+    def data_descriptor_size(self) -> int:
+        return 24 if self.zip64 else 16
+
+    def central_header(self) -> bytes:
+        extra_fields = []
+        size32 = self.size
+        offset32 = self.offset
+        if self.zip64:
+            extra_fields += [self.size, self.size]
+            size32 = ZIP32_LIMIT
+        if self.offset >= ZIP32_LIMIT:
+            extra_fields.append(self.offset)
+            offset32 = ZIP32_LIMIT
+        extra = struct.pack(f"<HH{len(extra_fields)}Q", 0x0001, 8 * len(extra_fields), *extra_fields) if extra_fields else b""
+        return struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014B50, self.version, self.version, FLAGS, 0, self.dos_time, self.dos_date,
+            self.crc, size32, size32, len(self.name), len(extra), 0, 0, 0, 0o100644 << 16, offset32,
+        ) + self.name + extra
+
+    def central_header_size(self) -> int:
+        extra_fields = (2 if self.zip64 else 0) + (1 if self.offset >= ZIP32_LIMIT else 0)
+        return 46 + len(self.name) + (4 + 8 * extra_fields if extra_fields else 0)
+
+
+class ZipStream:
+    """
+    Stream a STORED ZIP archive of `members` without staging anything on disk.
+
+    The layout only depends on file names and sizes, so the total length is known
+    before the first byte is sent and any byte range can be regenerated identically.
+    """
+
+    def __init__(self, members: List[ZipMember]):
+        self.members = members
+
+        offset = 0
+        for m in members:
+            m.offset = offset
+            offset += m.local_header_size() + m.size + m.data_descriptor_size()
+        self.cd_offset = offset
+        self.cd_size = sum(m.central_header_size() for m in members)
+
+        self.zip64_end = (
+            len(members) >= ZIP32_MAX_ENTRIES or self.cd_offset >= ZIP32_LIMIT or self.cd_size >= ZIP32_LIMIT
+        )
+        self.content_length = self.cd_offset + self.cd_size + (56 + 20 if self.zip64_end else 0) + 22
+
+    @property
+    def etag(self) -> str:
+        digest = hashlib.sha1()
+        for m in self.members:
+            digest.update(m.name + struct.pack("<QQ", m.size, m.mtime_ns))
+        return f'"{digest.hexdigest()}"'
+
+    def end_records(self) -> bytes:
+        records = b""
+        count = len(self.members)
+        if self.zip64_end:
+            zip64_eocd_offset = self.cd_offset + self.cd_size
+            records += struct.pack(
+                "<IQHHIIQQQQ", 0x06064B50, 44, VERSION_ZIP64, VERSION_ZIP64, 0, 0,
+                count, count, self.cd_size, self.cd_offset,
+            )
+            records += struct.pack("<IIQI", 0x07064B50, 0, zip64_eocd_offset, 1)
+        records += struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0,
+            min(count, ZIP32_MAX_ENTRIES), min(count, ZIP32_MAX_ENTRIES),
+            min(self.cd_size, ZIP32_LIMIT), min(self.cd_offset, ZIP32_LIMIT), 0,
+        )
+        return records
+
+    async def iter_bytes(self, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Yield the bytes of the archive in [start, end] (inclusive).
+        """
+        end = self.content_length - 1 if end is None else min(end, self.content_length - 1)
+        position = 0
+
+        def window(block: bytes, block_start: int) -> bytes:
+            return block[max(start - block_start, 0):end + 1 - block_start]
+
+        for m in self.members:
+            if position > end:
+                return
+
+            header_size = m.local_header_size()
+            if position + header_size > start:
+                yield window(m.local_header(), position)
+            position += header_size
+
+            if position + m.size > start and position <= end:
+                async for chunk in self._iter_member_data(m, max(start - position, 0), min(end - position, m.size - 1)):
+                    yield chunk
+            position += m.size
+
+            descriptor_size = m.data_descriptor_size()
+            if position + descriptor_size > start and position <= end:
+                await self._ensure_crc(m)
+                yield window(m.data_descriptor(), position)
+            position += descriptor_size
+
+        if position > end:
+            return
+
+        if position + self.cd_size > start:
+            for m in self.members:
+                size = m.central_header_size()
+                if position > end:
+                    return
+                if position + size > start:
+                    await self._ensure_crc(m)
+                    yield window(m.central_header(), position)
+                position += size
+        else:
+            position += self.cd_size
+
+        if position <= end:
+            yield window(self.end_records(), position)
+
+    async def _iter_member_data(self, m: ZipMember, first: int, last: int) -> AsyncIterator[bytes]:
+        # Le CRC est calculé au passage quand le fichier est lu en entier
+        compute_crc = m.crc is None and first == 0 and last == m.size - 1
+        crc = 0
+
+        async with aiofiles.open(m.path, "rb") as f:
+            await f.seek(first)
+            bytes_remaining = last - first + 1
+            while bytes_remaining > 0:
+                data = await f.read(min(CHUNK_SIZE, bytes_remaining))
+                if not data:
+                    raise IOError(f"{m.path} is shorter than announced")
+                bytes_remaining -= len(data)
+                if compute_crc:
+                    crc = zlib.crc32(data, crc)
+                yield data
+
+        if compute_crc:
+            self._store_crc(m, crc)
+
+    async def _ensure_crc(self, m: ZipMember):
+        if m.crc is None:
+            self._store_crc(m, await asyncio.to_thread(_file_crc32, m.path))
+
+    @staticmethod
+    def _store_crc(m: ZipMember, crc: int):
+        m.crc = crc
+        _remember_crc(m.cache_key, crc)
+
+
+def _file_crc32(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE * 16):
+            crc = zlib.crc32(chunk, crc)
+    return crc
@@ -1,12 +1,75 @@
 # Connexion to the database and initialization of Tortoise ORM
-from tortoise.contrib.fastapi import register_tortoise
-from app.core.config import DB_URL
+import os, asyncio, logging
+from tortoise import Tortoise
+from tortoise.contrib.fastapi import RegisterTortoise
+from app.core.config import DB_URL, GENERATE_SCHEMAS, MIGRATIONS_DIR, DB_POOL_WARMUP
+
 
 def init_db(app):
-    register_tortoise(
+    """
+    Return the async context manager that opens (and closes) the ORM.
+    Meant to be entered from the application lifespan hook.
+    """
+    return RegisterTortoise(
         app=app,
         db_url=DB_URL,
         modules={"models": ["app.db.models"]},
-        generate_schemas=True,
+        generate_schemas=GENERATE_SCHEMAS,
         add_exception_handlers=True,
-    )
\ No newline at end of file
+    )
+
+
+def get_latest_migration_version() -> str | None:
+    """
+    Name of the most recent aerich migration file shipped with the code (e.g. "1_20250715082922_update.py").
+    """
+    if not os.path.isdir(MIGRATIONS_DIR):
+        return None
+
+    versions = [f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(".py") and f.split("_", 1)[0].isdigit()]
+    if not versions:
+        return None
+    return max(versions, key=_migration_number)
+
+
+def _migration_number(version: str) -> int:
+    return int(version.split("_", 1)[0])
+
+
+async def check_migrations():
+    """
+    Compare the version recorded in the aerich table with the latest migration file.
+    Run once at startup instead of generate_schemas: a database that is behind the code raises,
+    one that is ahead (rolling deploy after `aerich upgrade`) only logs a warning.
+    """
+    expected = get_latest_migration_version()
+    if expected is None:
+        logging.warning("[check_migrations] No migration files found in %s", MIGRATIONS_DIR)
+        return None
+
+    conn = Tortoise.get_connection("default")
+    try:
+        _, rows = await conn.execute_query(
+            "SELECT version FROM aerich WHERE app = 'models' ORDER BY id DESC LIMIT 1"
+        )
+    except Exception as e:
+        raise RuntimeError(f"Unable to read aerich version, run `aerich upgrade` first: {e}") from e
+
+    applied = rows[0]["version"] if rows else None
+    if applied is None or _migration_number(applied) < _migration_number(expected):
+        raise RuntimeError(f"Database schema is at {applied!r}, expected {expected!r}: run `aerich upgrade`")
+    if _migration_number(applied) > _migration_number(expected):
+        # Déploiement progressif : les anciens workers tournent sur un schéma déjà migré
+        logging.warning("[check_migrations] Database schema %s is ahead of the code (%s)", applied, expected)
+        return applied
+
+    logging.info("[check_migrations] Database schema up to date (%s)", applied)
+    return applied
+
+
+async def warm_db_pool(size: int = DB_POOL_WARMUP):
+    """
+    Open `size` pool connections concurrently so the first requests don't pay the connect cost.
+    """
+    conn = Tortoise.get_connection("default")
+    await asyncio.gather(*(conn.execute_query("SELECT 1") for _ in range(max(size, 1))))
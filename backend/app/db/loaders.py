@@ -0,0 +1,129 @@
+# app/db/loaders.py
+# Request-scoped batching of primary key lookups (DataLoader pattern)
+
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Set
+from app.db.models import Podcast, User
+
+# Taille maximale d'une requête "id__in"
+MAX_BATCH_SIZE = 500
+
+
+class DataLoader:
+    """
+    Collect the keys requested during one event loop tick and resolve them with a single batch call.
+    Results are cached for the lifetime of the loader, i.e. one request.
+
+    batch_load_fn receives a list of keys and returns a dict {key: value}; missing keys resolve to None.
+    """
+
+    def __init__(self, batch_load_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]], max_batch_size: int = MAX_BATCH_SIZE):
+        self.batch_load_fn = batch_load_fn
+        self.max_batch_size = max_batch_size
+        self._cache: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+        # Références fortes vers les batchs en cours : asyncio ne garde que des références faibles
+        self._tasks: Set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> Awaitable[Any]:
+        if key in self._cache:
+            return self._cache[key]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+        self._queue.append(key)
+        if len(self._queue) == 1:
+            # Le batch part une fois que les autres coroutines prêtes ont demandé leurs clés
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, value: Any):
+        """Store an already known value so later loads don't hit the database."""
+        if key not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._cache[key] = future
+
+    def _dispatch(self):
+        keys, self._queue = self._queue, []
+        for i in range(0, len(keys), self.max_batch_size):
+            task = asyncio.ensure_future(self._run(keys[i:i + self.max_batch_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, keys: List[Hashable]):
+        try:
+            values = await self.batch_load_fn(keys)
+        except Exception as e:
+            for key in keys:
+                # Ne pas garder l'erreur en cache : un nouvel appel relancera la requête
+                future = self._cache.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in keys:
+            future = self._cache[key]
+            if not future.done():
+                future.set_result(values.get(key))
+
+
+class Loaders:
+    """
+    The loaders shared by every controller during one request.
+    """
+
+    def __init__(self):
+        self.podcast = DataLoader(self._load_podcasts)
+        # Sans jointure ni prefetch : pour les chemins qui n'ont besoin que du fichier audio (stream, archive)
+        self.podcast_file = DataLoader(self._load_podcast_files)
+        self.user = DataLoader(self._load_users)
+
+    async def _load_podcasts(self, ids: List[int]) -> Dict[int, Podcast]:
+        podcasts = await Podcast.filter(id__in=ids).select_related("author").prefetch_related("categories", "tags")
+        for p in podcasts:
+            self.user.prime(p.author_id, p.author)
+        return {p.id: p for p in podcasts}
+
+    async def _load_podcast_files(self, ids: List[int]) -> Dict[int, Podcast]:
+        podcasts = await Podcast.filter(id__in=ids)
+        return {p.id: p for p in podcasts}
+
+    async def _load_users(self, ids: List[int]) -> Dict[int, User]:
+        users = await User.filter(id__in=ids)
+        return {u.id: u for u in users}
+
+
+_request_loaders: ContextVar[Loaders | None] = ContextVar("request_loaders", default=None)
+
+
+def get_loaders() -> Loaders:
+    """
+    Loaders of the current request. Outside of a request (scripts, background jobs)
+    a fresh, uncached instance is returned.
+    """
+    return _request_loaders.get() or Loaders()
+
+
+class LoadersMiddleware:
+    """
+    ASGI middleware giving every HTTP request its own Loaders instance.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = _request_loaders.set(Loaders())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_loaders.reset(token)
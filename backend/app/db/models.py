@@ -18,6 +18,8 @@ class Podcast(Model):
     title = fields.CharField(max_length=255)
     description = fields.TextField()
     audio_file = fields.CharField(max_length=255)
+    # CRC32 du fichier audio calculé à l'upload (archives ZIP) ; NULL pour les épisodes plus anciens
+    audio_crc32 = fields.BigIntField(null=True)
     cover_image = fields.CharField(max_length=255, null=True)
     author = fields.ForeignKeyField("models.User", related_name="podcasts")
     duration = fields.IntField()
@@ -44,3 +46,26 @@ class Tag(Model):
     
     class Meta:
         table = "tags"  # pluriel recommandé
+
+
+# Recommandations précalculées par le job périodique (app.core.recommendations)
+class PodcastRelated(Model):
+    id = fields.IntField(pk=True)
+    podcast = fields.ForeignKeyField("models.Podcast", related_name="related_entries")
+    related = fields.ForeignKeyField("models.Podcast", related_name=False)
+    rank = fields.SmallIntField()
+    score = fields.FloatField()
+
+    class Meta:
+        table = "podcast_related"
+        unique_together = (("podcast", "rank"),)
+
+
+class PodcastTrending(Model):
+    rank = fields.IntField(pk=True, generated=False)
+    podcast = fields.ForeignKeyField("models.Podcast", related_name=False)
+    score = fields.FloatField()
+    computed_at = fields.DatetimeField()
+
+    class Meta:
+        table = "podcast_trending"
@@ -1,5 +1,9 @@
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI
-from app.db.init import init_db
+from app.core.startup import lifespan
+from app.db.loaders import LoadersMiddleware
 from app.routers import auth_router, user_router, podcast_router
 from fastapi.middleware.cors import CORSMiddleware
 import logging 
@@ -11,7 +15,8 @@ logging.basicConfig(
 
 app = FastAPI(
     title="Postcast API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -22,10 +27,13 @@ app.add_middleware(
     allow_headers=["*"],  # Autoriser tous les en-têtes
 )
 
+# Un DataLoader par requête : les recherches concurrentes par ID sont regroupées
+app.add_middleware(LoadersMiddleware)
+
 # Inclusion des routes définies dans les modules routers
 app.include_router(user_router.router, prefix="/users", tags=["Users"])
 app.include_router(auth_router.router, prefix="/auth", tags=["Auth"])
 app.include_router(podcast_router.router, prefix="/podcasts", tags=["Podcasts"])
 
-# Initialisation de la base de données
-init_db(app)
+# Durée de l'import de l'application, reportée avec les autres phases de démarrage
+app.state.import_ms = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 2)
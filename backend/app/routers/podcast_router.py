@@ -1,14 +1,57 @@
 # app/routers/podcast.py
 
 import logging
-from fastapi import APIRouter, UploadFile, File, Form, Depends, Request
+from typing import List
+from fastapi import APIRouter, UploadFile, File, Form, Depends, Request, Query
 from app.controllers.auth_controller import get_current_user_info
 from app.controllers.podcast_controller import create_podcast
 from app.schemas.podcast_schema import PodcastOut
-from app.controllers.podcast_controller import stream_podcast_controller, get_all_podcasts_by_user, get_podcast_by_id
+from app.controllers.podcast_controller import stream_podcast_controller, get_all_podcasts_by_user, get_podcast_by_id, get_podcasts_by_ids, get_stream_cache_stats, download_archive_controller, stream_events_controller
+from app.controllers.podcast_controller import get_trending_podcasts, get_related_podcasts
+from app.schemas.schemas import PodcastBatchIn
 
 router = APIRouter()
 
+@router.post("/batch")
+async def get_podcasts_batch(payload: PodcastBatchIn):
+    """
+    Retrieve many podcasts by their IDs in a single call (e.g. to render a playlist).
+    """
+    return await get_podcasts_by_ids(payload.ids)
+
+
+@router.get("/archive")
+async def download_archive(
+    request: Request,
+    ids: List[int] | None = Query(None),
+    author_id: int | None = None,
+):
+    """
+    Download the selected podcasts (?ids=1&ids=2) or a whole show (?author_id=1) as a ZIP archive.
+    """
+    return await download_archive_controller(request, podcast_ids=ids, author_id=author_id)
+
+
+@router.get("/events")
+async def podcast_events(
+    request: Request,
+    author_ids: List[int] | None = Query(None),
+    category_ids: List[int] | None = Query(None),
+):
+    """
+    Server-Sent Events stream of new episodes (?author_ids=1&category_ids=2). Supports Last-Event-ID.
+    """
+    return await stream_events_controller(request, author_ids=author_ids, category_ids=category_ids)
+
+
+@router.get("/trending")
+async def trending_podcasts(limit: int = Query(20, ge=1, le=100)):
+    """
+    Retrieve the trending podcasts (precomputed periodically).
+    """
+    return await get_trending_podcasts(limit)
+
+
 @router.get("/{podcast_id}")
 async def get_podcast(podcast_id: int):
     """
@@ -16,6 +59,14 @@ async def get_podcast(podcast_id: int):
     """
     return await get_podcast_by_id(podcast_id)
 
+
+@router.get("/{podcast_id}/related")
+async def related_podcasts(podcast_id: int, limit: int = Query(10, ge=1, le=50)):
+    """
+    Retrieve podcasts similar to the given one (precomputed from shared tags and categories).
+    """
+    return await get_related_podcasts(podcast_id, limit)
+
 @router.get("/me")
 async def get_my_podcasts(current_user=Depends(get_current_user_info)):
     """
@@ -43,6 +94,14 @@ async def upload_podcast(
     )
 
 
+@router.get("/stream/cache-stats")
+async def stream_cache_stats():
+    """
+    Metrics of the streaming segment cache (hit ratio, resident size).
+    """
+    return get_stream_cache_stats()
+
+
 @router.get("/stream/{podcast_id}")
 async def stream_podcast(podcast_id: int, request: Request, info: bool = False):
     return await stream_podcast_controller(podcast_id, request, info)
@@ -1,6 +1,6 @@
 from tortoise.contrib.pydantic import pydantic_model_creator
 from app.db.models import User
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 User_Pydantic = pydantic_model_creator(User, name="User", exclude=["hashed_password"])
@@ -20,3 +20,6 @@ class PodcastIn(BaseModel):
     title: str
     category_ids: Optional[List[int]] = []
     tag_ids: Optional[List[int]] = []
+
+class PodcastBatchIn(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=200)
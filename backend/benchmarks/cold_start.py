@@ -0,0 +1,74 @@
+"""
+Cold-start benchmark for the API.
+
+Each run starts a fresh interpreter, imports `app.main` and (unless --import-only)
+enters the lifespan hook, then prints the startup phase timings.
+
+Usage (from backend/):
+    python -m benchmarks.cold_start --runs 10
+    APP_ENV=production python -m benchmarks.cold_start --runs 10
+    python -m benchmarks.cold_start --import-only
+"""
+
+import argparse, json, os, statistics, subprocess, sys
+
+CHILD = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+from app.main import app
+import_ms = (time.perf_counter() - t0) * 1000
+result = {"import_ms": round(import_ms, 2), "modules": len(sys.modules)}
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        result["startup"] = app.state.startup_timings
+
+if not IMPORT_ONLY:
+    t1 = time.perf_counter()
+    asyncio.run(boot())
+    result["lifespan_ms"] = round((time.perf_counter() - t1) * 1000, 2)
+result["total_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+print(json.dumps(result))
+"""
+
+
+def run_once(import_only: bool) -> dict:
+    code = f"IMPORT_ONLY = {import_only!r}\n" + CHILD
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(name: str, values: list[float]):
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    print(f"{name:>14}: median={statistics.median(values):8.2f} ms  min={values[0]:8.2f} ms  p95={p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-only", action="store_true", help="measure the import of app.main only (no database)")
+    args = parser.parse_args()
+
+    results = [run_once(args.import_only) for _ in range(args.runs)]
+
+    print(f"APP_ENV={os.getenv('APP_ENV', 'development')}  runs={args.runs}  modules={results[-1]['modules']}")
+    summarize("import", [r["import_ms"] for r in results])
+    if not args.import_only:
+        summarize("lifespan", [r["lifespan_ms"] for r in results])
+        phases = results[-1]["startup"]["phases"]
+        for phase in phases:
+            if phase != "imports":
+                summarize(phase, [r["startup"]["phases"][phase] for r in results])
+    summarize("total", [r["total_ms"] for r in results])
+
+
+if __name__ == "__main__":
+    main()
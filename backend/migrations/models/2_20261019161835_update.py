@@ -0,0 +1,25 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "podcast_related" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "rank" SMALLINT NOT NULL,
+    "score" DOUBLE PRECISION NOT NULL,
+    "podcast_id" INT NOT NULL REFERENCES "podcasts" ("id") ON DELETE CASCADE,
+    "related_id" INT NOT NULL REFERENCES "podcasts" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_podcast_rel_podcast_9b0e4f" UNIQUE ("podcast_id", "rank")
+);
+        CREATE TABLE IF NOT EXISTS "podcast_trending" (
+    "rank" INT NOT NULL PRIMARY KEY,
+    "score" DOUBLE PRECISION NOT NULL,
+    "computed_at" TIMESTAMPTZ NOT NULL,
+    "podcast_id" INT NOT NULL REFERENCES "podcasts" ("id") ON DELETE CASCADE
+);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "podcast_related";
+        DROP TABLE IF EXISTS "podcast_trending";"""